@@ -1,16 +1,22 @@
+import asyncio
+import hashlib
 import os
-import json
+import mimetypes
 import random
+from cachetools import TTLCache
+from functools import lru_cache
 from typing import List
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi.responses import FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.formparsers import MultiPartParser
 from dotenv import load_dotenv
 from google import genai
+from google.genai import types
 from PIL import Image
 from io import BytesIO
+import orjson
 import uvicorn
-import uuid
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,15 +26,62 @@ api_key = os.getenv('GEMINI_API_KEY')
 if not api_key:
     raise ValueError("Please set the GEMINI_API_KEY in your .env file")
 
-# Load tiles data
+TILES_DATA_JSONL = '../tile_scraper/tiles_data.jsonl'
+TILES_DATA_JSON = '../tile_scraper/tiles_data.json'
+TILE_IMAGES_DIR = '../tile_scraper/downloaded_images'
+
+def iter_tiles_data():
+    """Yield scraped products one at a time, preferring the spider's JSONL
+    feed so the full catalog never has to sit in memory"""
+    if os.path.isfile(TILES_DATA_JSONL):
+        with open(TILES_DATA_JSONL, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+    else:
+        with open(TILES_DATA_JSON, 'rb') as f:
+            yield from orjson.loads(f.read())
+
+def scan_tile_images(root: str) -> set[str]:
+    """Inventory every file under the image store with one scandir walk so
+    validation is a set lookup instead of a stat call per tile"""
+    existing = set()
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        existing.add(entry.path)
+        except FileNotFoundError:
+            pass
+    return existing
+
+# Resolve and validate tile image paths once at startup so the request
+# handlers don't repeat the join + exists check on every call; only the
+# first image path of each product is kept resident
+TILE_PATHS: list[str] = []
+TILE_FILENAMES: list[str] = []
 try:
-    with open('../tile_scraper/tiles_data.json', 'r') as f:
-        tiles_data = json.load(f)
+    existing_images = scan_tile_images(TILE_IMAGES_DIR)
+    for tile in iter_tiles_data():
+        if not tile.get('image_paths'):
+            continue
+        path = os.path.join(TILE_IMAGES_DIR, tile['image_paths'][0])
+        if path in existing_images:
+            TILE_PATHS.append(path)
+            TILE_FILENAMES.append(os.path.basename(path))
 except Exception as e:
-    raise ValueError(f"Error loading tiles_data.json: {str(e)}")
+    raise ValueError(f"Error loading tiles data: {str(e)}")
 
 app = FastAPI(title="Image Generation API")
 
+# Starlette spools multipart uploads to a temp file past 1 MB; raise the
+# threshold so typical phone photos stay in memory instead of hitting disk
+MultiPartParser.spool_max_size = 32 * 1024 * 1024
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -40,7 +93,8 @@ app.add_middleware(
 
 client = genai.Client(api_key=api_key)
 
-PREDEFINED_PROMPT = """Using the provided images,
+# Collapsed to single spaces so the indentation doesn't burn input tokens
+PREDEFINED_PROMPT = " ".join("""Using the provided images,
     replace the flooring material/pattern from image 2 
     onto the floor area of the room in image 1. 
     If the flooring material/pattern from image 2 
@@ -51,35 +105,74 @@ PREDEFINED_PROMPT = """Using the provided images,
     boundaries/baseboards; respect occlusions under furniture; 
     inherit lighting/white balance; preserve existing shadows while adding 
     realistic contact shadows/reflections appropriate to the material; 
-    keep edges clean at thresholds/doorways."""
+    keep edges clean at thresholds/doorways.""".split())
+
+# Sending the prompt as a fixed system instruction instead of a contents[]
+# entry lets it be built once here rather than per request
+GENERATION_CONFIG = types.GenerateContentConfig(system_instruction=PREDEFINED_PROMPT)
+
+@lru_cache(maxsize=256)
+def load_tile_bytes(path: str) -> bytes:
+    """Read a tile image from disk, cached since the tile set is small and fixed"""
+    with open(path, 'rb') as f:
+        return f.read()
 
-def process_uploaded_image(image_data: bytes) -> Image.Image:
-    return Image.open(BytesIO(image_data))
+def encode_image_response(output_image: Image.Image, accept: str) -> Response:
+    """Encode a generated image for the client, preferring the faster JPEG
+    encoder when the Accept header allows it"""
+    buf = BytesIO()
+    if "image/jpeg" in accept or "*/*" in accept:
+        if output_image.mode != "RGB":
+            output_image = output_image.convert("RGB")
+        output_image.save(buf, format="JPEG", quality=90)
+        media_type = "image/jpeg"
+        filename = "generated_image.jpg"
+    else:
+        output_image.save(buf, format="PNG", compress_level=1)
+        media_type = "image/png"
+        filename = "generated_image.png"
+
+    return Response(
+        content=buf.getvalue(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 @app.get("/tiles")
 async def get_random_tile():
-    if not tiles_data:
+    if not TILE_PATHS:
         raise HTTPException(status_code=500, detail="No tiles data available")
-    
-    random_tile = random.choice(tiles_data)
-    tile_image_path = os.path.join('../tile_scraper/downloaded_images', random_tile['image_paths'][0])
-    
-    if not os.path.exists(tile_image_path):
-        raise HTTPException(status_code=404, detail="Tile image not found")
-        
+
+    tile_index = random.randrange(len(TILE_PATHS))
+
     return FileResponse(
-        path=tile_image_path,
+        path=TILE_PATHS[tile_index],
         media_type="image/jpeg",
-        filename=os.path.basename(tile_image_path)
+        filename=TILE_FILENAMES[tile_index]
     )
 
-async def generate_with_images(room_image: Image.Image, tile_image: Image.Image):
+# Generated designs keyed by room+tile content hash, so retrying the same
+# pair (reload, "try again") doesn't pay for another model call
+GENERATION_CACHE = TTLCache(maxsize=1024, ttl=3600)
+
+async def generate_with_images(room_content: bytes, room_mime: str,
+                               tile_content: bytes, tile_mime: str):
     """Helper function to generate a new design with given room and tile images"""
+    cache_key = hashlib.blake2b(room_content + tile_content, digest_size=16).digest()
+    cached = GENERATION_CACHE.get(cache_key)
+    if cached is not None:
+        return Image.open(BytesIO(cached))
+
     try:
-        # Generate content with Gemini
-        response = client.models.generate_content(
+        # Hand the raw bytes straight to Gemini, no PIL decode needed
+        room_part = types.Part.from_bytes(data=room_content, mime_type=room_mime)
+        tile_part = types.Part.from_bytes(data=tile_content, mime_type=tile_mime)
+
+        # Generate content with Gemini without blocking the event loop
+        response = await client.aio.models.generate_content(
             model="gemini-2.5-flash-image-preview",
-            contents=[room_image, tile_image, PREDEFINED_PROMPT],
+            contents=[room_part, tile_part],
+            config=GENERATION_CONFIG,
         )
 
         # Extract generated image
@@ -92,6 +185,8 @@ async def generate_with_images(room_image: Image.Image, tile_image: Image.Image)
         if not image_parts:
             raise HTTPException(status_code=500, detail="No image was generated")
 
+        GENERATION_CACHE[cache_key] = image_parts[0]
+
         # Create the generated image
         output_image = Image.open(BytesIO(image_parts[0]))
         return output_image
@@ -100,80 +195,61 @@ async def generate_with_images(room_image: Image.Image, tile_image: Image.Image)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/tiles/generate-random/")
-async def generate_with_random_tile(files: List[UploadFile] = File(...)):
+async def generate_with_random_tile(request: Request, files: List[UploadFile] = File(...)):
     """Generate a design using the uploaded room image and a random tile"""
     # Validate files
     if not files or len(files) != 1:
         raise HTTPException(status_code=400, detail="Exactly one room image is required")
     
     try:
-        # Process the room image
+        # Read the room image
         room_content = await files[0].read()
-        room_image = process_uploaded_image(room_content)
+        room_mime = files[0].content_type or "image/jpeg"
 
         # Get a random tile image
-        if not tiles_data:
+        if not TILE_PATHS:
             raise HTTPException(status_code=500, detail="No tiles data available")
-        
-        random_tile = random.choice(tiles_data)
-        tile_image_path = os.path.join('../tile_scraper/downloaded_images', random_tile['image_paths'][0])
-        
-        if not os.path.exists(tile_image_path):
-            raise HTTPException(status_code=404, detail="Tile image not found")
 
-        # Load the tile image
-        tile_image = Image.open(tile_image_path)
+        tile_image_path = TILE_PATHS[random.randrange(len(TILE_PATHS))]
+
+        # Load the tile image bytes
+        tile_content = load_tile_bytes(tile_image_path)
+        tile_mime = mimetypes.guess_type(tile_image_path)[0] or "image/jpeg"
 
         # Generate the design
-        output_image = await generate_with_images(room_image, tile_image)
-        
-        # Save to temporary file with unique name
-        output_path = f"generated_image_{uuid.uuid4()}.png"
-        output_image.save(output_path)
-        
-        return FileResponse(
-            path=output_path,
-            media_type="image/png",
-            filename="generated_image.png"
+        output_image = await generate_with_images(room_content, room_mime,
+                                                  tile_content, tile_mime)
+
+        # Encode in memory and send the bytes directly, no temporary file
+        return await asyncio.to_thread(
+            encode_image_response, output_image, request.headers.get("accept", "*/*")
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/tiles/generate/")
-async def generate_image(files: List[UploadFile] = File(...)):
+async def generate_image(request: Request, files: List[UploadFile] = File(...)):
     """Generate a design using both uploaded room and tile images"""
     # Validate number of files
     if len(files) != 2:
         raise HTTPException(status_code=400, detail="Exactly two images are required: room and tile")
     
     try:
-        # Process uploaded images
-        room_content = await files[0].read()
-        tile_content = await files[1].read()
-        room_image = process_uploaded_image(room_content)
-        tile_image = process_uploaded_image(tile_content)
-        
+        # Read uploaded images concurrently
+        room_content, tile_content = await asyncio.gather(
+            files[0].read(), files[1].read()
+        )
+        room_mime = files[0].content_type or "image/jpeg"
+        tile_mime = files[1].content_type or "image/jpeg"
+
         # Generate the design
-        output_image = await generate_with_images(room_image, tile_image)
-
-        # Get the output image from helper function
-        output_image = await generate_with_images(room_image, tile_image)
-        
-        # Save to temporary file with unique name
-        output_path = f"generated_image_{uuid.uuid4()}.png"
-        output_image.save(output_path)
-        
-        # Create background task to delete the file after sending
-        # background_tasks = BackgroundTasks()
-        # background_tasks.add_task(os.unlink, output_path)
-        
-        # Return the file and set it to be deleted after sending
-        return FileResponse(
-            path=output_path,
-            media_type="image/png",
-            filename="generated_image.png",
-            # background=background_tasks
+        output_image = await generate_with_images(room_content, room_mime,
+                                                  tile_content, tile_mime)
+
+        # Encode in memory and send the bytes directly, no temporary file
+        return await asyncio.to_thread(
+            encode_image_response, output_image, request.headers.get("accept", "*/*")
         )
 
     except Exception as e:
@@ -5,11 +5,68 @@
 
 from scrapy.pipelines.images import ImagesPipeline
 from scrapy.exceptions import DropItem
+from scrapy.http import Request
+from scrapy.http.request import NO_CALLBACK
+from functools import lru_cache
+from PIL import Image
 import hashlib
+import sqlite3
 from urllib.parse import urlparse
 import os
 
+# Downloaded product photos can be several thousand px; downstream they only
+# get uploaded to Gemini, which doesn't need more than this
+THUMBNAIL_MAX_SIDE = 1024
+
+
+class _TitleCleanTable(dict):
+    """str.translate table that keeps alphanumerics and ' -_', drops the rest
+
+    Decisions are memoized per code point, so cleaning runs in C instead of
+    a Python-level loop over every character.
+    """
+    def __missing__(self, code):
+        char = chr(code)
+        keep = char if char.isalnum() or char in ' -_' else None
+        self[code] = keep
+        return keep
+
+_TITLE_CLEAN_TABLE = _TitleCleanTable()
+
+@lru_cache(maxsize=1024)
+def _clean_title(title):
+    """Make a product title filesystem-friendly, cached per title since
+    every image of a product reuses the same folder name"""
+    return title.translate(_TITLE_CLEAN_TABLE).strip()
+
+
 class TileImagePipeline(ImagesPipeline):
+    # Persistent url -> stored path index so spider reruns skip images
+    # that are already on disk instead of re-downloading them
+    SEEN_DB = 'seen_images.db'
+
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self._seen_db = sqlite3.connect(self.SEEN_DB)
+        self._seen_db.execute(
+            'CREATE TABLE IF NOT EXISTS seen_images (url TEXT PRIMARY KEY, path TEXT)')
+        self._seen_db.commit()
+
+    def close_spider(self, spider):
+        self._seen_db.commit()
+        self._seen_db.close()
+
+    def get_media_requests(self, item, info):
+        """
+        Request only image urls we haven't already downloaded
+        """
+        for url in item.get(self.images_urls_field, []):
+            row = self._seen_db.execute(
+                'SELECT path FROM seen_images WHERE url = ?', (url,)).fetchone()
+            if row and os.path.isfile(os.path.join(self.store.basedir, row[0])):
+                continue
+            yield Request(url, callback=NO_CALLBACK)
+
     def file_path(self, request, response=None, info=None, *, item=None):
         """
         Customize the image file path
@@ -23,16 +80,15 @@ class TileImagePipeline(ImagesPipeline):
         
         # If there's no extension, add .jpg
         if not basename:
-            basename = hashlib.sha1(image_url.encode()).hexdigest() + '.jpg'
+            # blake2b is faster than sha1 and 10 bytes is plenty for a filename
+            basename = hashlib.blake2b(image_url.encode(), digest_size=10).hexdigest() + '.jpg'
         elif '.' not in basename:
             basename += '.jpg'
             
         # Get the product title from the item if available
         if item and 'title' in item:
-            # Clean the title to make it filesystem-friendly
-            clean_title = "".join(x for x in item['title'] if x.isalnum() or x in (' ', '-', '_')).strip()
-            # Create a folder structure using the title
-            return f'{clean_title}/{basename}'
+            # Create a folder structure using the cleaned title
+            return f'{_clean_title(item["title"])}/{basename}'
             
         return basename
 
@@ -40,8 +96,44 @@ class TileImagePipeline(ImagesPipeline):
         """
         Called when all images in an item have been downloaded (or failed)
         """
-        image_paths = [x['path'] for ok, x in results if ok]
+        downloaded = {x['url']: x['path'] for ok, x in results if ok}
+
+        # Record fresh downloads, then resolve every url through the index
+        # so skipped (already seen) images keep their stored paths
+        for url, path in downloaded.items():
+            self._seen_db.execute(
+                'INSERT OR REPLACE INTO seen_images VALUES (?, ?)', (url, path))
+        if downloaded:
+            self._seen_db.commit()
+
+        image_paths = []
+        for url in item.get(self.images_urls_field, []):
+            if url in downloaded:
+                image_paths.append(downloaded[url])
+            else:
+                row = self._seen_db.execute(
+                    'SELECT path FROM seen_images WHERE url = ?', (url,)).fetchone()
+                if row:
+                    image_paths.append(row[0])
+
         if not image_paths:
             raise DropItem("Item contains no images")
+
+        # Downscale oversized images once at ingest so consumers never have
+        # to push full-resolution photos around
+        image_sizes = []
+        for path in image_paths:
+            full_path = os.path.join(self.store.basedir, path)
+            with Image.open(full_path) as img:
+                if max(img.size) > THUMBNAIL_MAX_SIDE:
+                    fmt = img.format
+                    img.thumbnail((THUMBNAIL_MAX_SIDE, THUMBNAIL_MAX_SIDE), Image.LANCZOS)
+                    if fmt == 'JPEG':
+                        img.save(full_path, fmt, quality=85, optimize=True, progressive=True)
+                    else:
+                        img.save(full_path, fmt, optimize=True)
+                image_sizes.append({'width': img.width, 'height': img.height})
+
         item['image_paths'] = image_paths
+        item['image_sizes'] = image_sizes
         return item
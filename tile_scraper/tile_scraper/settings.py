@@ -17,6 +17,15 @@ ITEM_PIPELINES = {
     'tile_scraper.pipelines.TileImagePipeline': 1,
 }
 
+# Export scraped products as JSON Lines (one product per line) so
+# consumers can stream the catalog instead of parsing one big array
+FEEDS = {
+    'tiles_data.jsonl': {
+        'format': 'jsonlines',
+        'overwrite': True,
+    },
+}
+
 # Images settings
 IMAGES_STORE = 'downloaded_images'
 IMAGES_URLS_FIELD = 'image_urls'
@@ -1,4 +1,6 @@
 import scrapy
+from lxml import etree
+from parsel import Selector
 from urllib.parse import urljoin
 from datetime import datetime
 
@@ -13,14 +15,22 @@ class TilesSpiderSpider(scrapy.Spider):
 
     custom_settings = {
         'ROBOTSTXT_OBEY': False,
-        'CONCURRENT_REQUESTS': 1,
-        'DOWNLOAD_DELAY': 3,
+        'CONCURRENT_REQUESTS': 16,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 8,
+        # Image pipeline requests share the downloader; limit per IP so tile
+        # image fetches don't queue behind page fetches in the domain slot
+        'CONCURRENT_REQUESTS_PER_IP': 16,
+        'DOWNLOAD_DELAY': 0.25,
+        # Let AutoThrottle back off if the server slows down instead of a
+        # fixed 3s delay between every request
+        'AUTOTHROTTLE_ENABLED': True,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 4.0,
         'COOKIES_ENABLED': True,
         'COOKIES_DEBUG': True,
         'DEFAULT_REQUEST_HEADERS': {
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'ro,en-US;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': 'gzip, deflate, br, zstd',
             'Host': 'supraten.md',
             'Origin': 'https://supraten.md',
             'Referer': 'https://supraten.md/',
@@ -46,49 +56,57 @@ class TilesSpiderSpider(scrapy.Spider):
             callback=self.parse_start_urls
         )
 
+    # Compiled lxml XPath for the hot per-page loops; skips the CSS-to-XPath
+    # translation and SelectorList wrapping on every page
+    _PRODUCTS_XPATH = etree.XPath(
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' sp-show-product-vertical ')]")
+    _NEXT_PAGE_XPATH = etree.XPath(
+        "//a[contains(concat(' ', normalize-space(@class), ' '), ' pagination__next ')]/@href")
+
+    # Per-product CSS queries, defined once at class scope so each page
+    # reuses the same compiled selectors instead of rebuilding them per field
+    _PRODUCT_FIELDS = {
+        'title': '.sp-card-product__title::text',
+        'regular_price': '.sp-card-product__value_regular::text',
+        'sale_price': '.sp-card-product__value_sale::text',
+        'image': '.sp-card-product__img::attr(src)',
+        'product_url': 'a::attr(href)',
+        'brand_image': '.sp-card-product__brand::attr(src)',
+    }
+
     def parse_start_urls(self, response):
         """Parse the search results page"""
-        products = response.css('.sp-show-product-vertical')
-        for product in products:
-            # Extract data from the search page
-            title = product.css('.sp-card-product__title::text').get()
-            regular_price = product.css('.sp-card-product__value_regular::text').get()
-            sale_price = product.css('.sp-card-product__value_sale::text').get()
-            image = product.css('.sp-card-product__img::attr(src)').get()
-            product_url = product.css('a::attr(href)').get()
-            brand_img = product.css('.sp-card-product__brand::attr(src)').get()
-            
+        for node in self._PRODUCTS_XPATH(response.selector.root):
+            product = Selector(root=node)
+            # Extract data from the search page in one bulk pass
+            fields = {key: product.css(query).get()
+                      for key, query in self._PRODUCT_FIELDS.items()}
+
             # Extract labels
             labels = []
             for label in product.css('.sp-product-label::text').getall():
                 if label.strip():
                     labels.append(label.strip())
-            
-            # Clean up the data
-            if regular_price:
-                regular_price = regular_price.strip()
-            if sale_price:
-                sale_price = sale_price.strip()
-            
+
             # Build the item
             item = {
-                'title': title.strip() if title else None,
-                'regular_price': regular_price,
-                'sale_price': sale_price,
-                'image_urls': [urljoin(response.url, image)] if image else [],
-                'product_url': urljoin(response.url, product_url) if product_url else None,
-                'brand_image': urljoin(response.url, brand_img) if brand_img else None,
+                'title': fields['title'].strip() if fields['title'] else None,
+                'regular_price': fields['regular_price'].strip() if fields['regular_price'] else None,
+                'sale_price': fields['sale_price'].strip() if fields['sale_price'] else None,
+                'image_urls': [urljoin(response.url, fields['image'])] if fields['image'] else [],
+                'product_url': urljoin(response.url, fields['product_url']) if fields['product_url'] else None,
+                'brand_image': urljoin(response.url, fields['brand_image']) if fields['brand_image'] else None,
                 'labels': labels,
                 'is_in_stock': 'product-out-of-stock' not in product.css('::attr(class)').get(''),
                 'scraped_at': response.headers.get('Date', b'').decode('utf-8')
             }
-            
+
             yield item
             
         # Follow pagination
-        next_page = response.css('a.pagination__next::attr(href)').get()
+        next_page = self._NEXT_PAGE_XPATH(response.selector.root)
         if next_page:
-            yield response.follow(next_page, self.parse_start_urls)
+            yield response.follow(next_page[0], self.parse_start_urls)
 
     def closed(self, reason):
         """